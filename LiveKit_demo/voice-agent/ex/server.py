@@ -36,6 +36,8 @@ class RealtimeWebSocketManager:
         self.active_sessions: dict[str, RealtimeSession] = {}
         self.session_contexts: dict[str, Any] = {}
         self.websockets: dict[str, WebSocket] = {}
+        self.audio_queues: dict[str, asyncio.Queue[bytes]] = {}
+        self.audio_pumps: dict[str, asyncio.Task] = {}
 
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
@@ -51,7 +53,15 @@ class RealtimeWebSocketManager:
         # Start event processing task
         asyncio.create_task(self._process_events(session_id))
 
+        # One long-running task forwards this session's audio, so each incoming
+        # frame only costs a queue append
+        self.audio_queues[session_id] = asyncio.Queue(maxsize=100)
+        self.audio_pumps[session_id] = asyncio.create_task(self._pump_audio(session_id))
+
     async def disconnect(self, session_id: str):
+        if session_id in self.audio_pumps:
+            self.audio_pumps.pop(session_id).cancel()
+        self.audio_queues.pop(session_id, None)
         if session_id in self.session_contexts:
             await self.session_contexts[session_id].__aexit__(None, None, None)
             del self.session_contexts[session_id]
@@ -60,9 +70,28 @@ class RealtimeWebSocketManager:
         if session_id in self.websockets:
             del self.websockets[session_id]
 
-    async def send_audio(self, session_id: str, audio_bytes: bytes):
-        if session_id in self.active_sessions:
-            await self.active_sessions[session_id].send_audio(audio_bytes)
+    def send_audio(self, session_id: str, audio_bytes: bytes):
+        queue = self.audio_queues.get(session_id)
+        if queue is None:
+            return
+        if queue.full():
+            # Drop the oldest frame rather than fall behind real time
+            queue.get_nowait()
+        queue.put_nowait(audio_bytes)
+
+    async def _pump_audio(self, session_id: str):
+        try:
+            session = self.active_sessions[session_id]
+            queue = self.audio_queues[session_id]
+
+            while True:
+                await session.send_audio(await queue.get())
+        except Exception as e:
+            logger.error(f"Error sending audio for session {session_id}: {e}")
+            # Close the socket so the client sees the session end instead of
+            # streaming into a dead pump; the receive loop then disconnects
+            if session_id in self.websockets:
+                await self.websockets[session_id].close(code=1011)
 
     async def _process_events(self, session_id: str):
         try:
@@ -136,14 +165,22 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     await manager.connect(websocket, session_id)
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+
+            if frame.get("bytes") is not None:
+                # Binary frames are raw int16 PCM, forwarded without any parsing
+                manager.send_audio(session_id, frame["bytes"])
+                continue
+
+            message = json.loads(frame["text"])
 
             if message["type"] == "audio":
                 # Convert int16 array to bytes
                 int16_data = message["data"]
                 audio_bytes = struct.pack(f"{len(int16_data)}h", *int16_data)
-                await manager.send_audio(session_id, audio_bytes)
+                manager.send_audio(session_id, audio_bytes)
 
     except WebSocketDisconnect:
         await manager.disconnect(session_id)
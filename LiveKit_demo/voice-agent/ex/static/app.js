@@ -152,10 +152,8 @@ class RealtimeDemo {
                         int16Buffer[i] = Math.max(-32768, Math.min(32767, inputBuffer[i] * 32768));
                     }
                     
-                    this.ws.send(JSON.stringify({
-                        type: 'audio',
-                        data: Array.from(int16Buffer)
-                    }));
+                    // Send raw int16 PCM as a binary frame, no JSON encoding per chunk
+                    this.ws.send(int16Buffer.buffer);
                 }
             };
             
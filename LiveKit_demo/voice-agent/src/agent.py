@@ -6,25 +6,44 @@ from livekit.plugins import (
     openai,
     noise_cancellation,
 )
-from src.tools.tools import get_wheather, query_information, get_contact_info
+from src.tools.tools import get_wheather, query_information, get_contact_info, SessionResources, make_http_client
+from src.tools.rag import load_vector_index, make_embeddings
 load_dotenv(".env")
 
 
 
 #from tools import get_wheather
 class Assistant(Agent):
+    # built once at import and shared by every session
+    _SYSTEM_INSTRUCTIONS = "Your name is voxhive a helpful voice AI assistant, use the available tools to answer the queries you dont know."
+    _TOOLS = (
+        get_wheather,
+        query_information,
+        get_contact_info,
+    )
+
     def __init__(self) -> None:
-        super().__init__(instructions="Your name is voxhive a helpful voice AI assistant, use the available tools to answer the queries you dont know.",
-                        tools = [
-                            get_wheather,
-                            query_information,
-                            get_contact_info
-                            ]
-                        )   
+        super().__init__(instructions=self._SYSTEM_INSTRUCTIONS,
+                        tools = list(self._TOOLS)
+                        )
     
 
+def prewarm(proc: agents.JobProcess):
+    # load the already ingested index before any job is assigned, so the first tool call
+    # of a conversation doesn't pay for it. ingestion itself is `python -m src.tools.rag`
+    proc.userdata["vector_index"] = load_vector_index()
+
+
 async def entrypoint(ctx: agents.JobContext):
-    session = AgentSession(
+    # async clients are bound to this job's event loop, so each job opens and closes its own
+    http = make_http_client()
+    ctx.add_shutdown_callback(http.aclose)
+    session = AgentSession[SessionResources](
+        userdata=SessionResources(
+            vector_index=ctx.proc.userdata["vector_index"],
+            embeddings=make_embeddings(),
+            http=http,
+        ),
         llm=openai.realtime.RealtimeModel(
             voice="coral"
         )
@@ -44,4 +63,4 @@ async def entrypoint(ctx: agents.JobContext):
 
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
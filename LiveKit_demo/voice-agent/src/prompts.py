@@ -1,3 +0,0 @@
-from langchain.prompts import ChatPromptTemplate
-from pydantic import BaseModel
-
@@ -1,40 +1,198 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-import os
-from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
-from langchain_core.documents import Document
+from __future__ import annotations
+import asyncio
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from bisect import bisect_right
+from typing import TYPE_CHECKING
+import numpy as np
+import openai
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 from dotenv import load_dotenv
+if TYPE_CHECKING:
+    from langchain_openai import OpenAIEmbeddings
 load_dotenv()
-def load_text(file_path:str)->str:
+KNOWLEDGE_FILE = str(Path(__file__).resolve().parents[2] / "knowledge" / "rag_file.txt")
+PERSIST_DIRECTORY = "./chroma_db"
+EMBEDDING_MODEL = "text-embedding-3-small"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+SEPARATOR_RE = re.compile(r"\n\n|\n| ")
+def split_text(text:str, chunk_size:int=CHUNK_SIZE, chunk_overlap:int=CHUNK_OVERLAP)->list[str]:
+    """Greedily pack the text into chunks of at most chunk_size characters, cutting
+    right after a paragraph, line or word separator. Each chunk starts at the first
+    separator inside the last chunk_overlap characters of the previous one."""
+    boundaries = [m.end() for m in SEPARATOR_RE.finditer(text)]
+    boundaries.append(len(text))
+    chunks = []
+    start = 0
+    while start < len(text):
+        j = bisect_right(boundaries, start + chunk_size) - 1
+        # no separator in reach, hard cut at chunk_size
+        end = boundaries[j] if j >= 0 and boundaries[j] > start else min(start + chunk_size, len(text))
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end == len(text):
+            break
+        k = bisect_right(boundaries, max(end - chunk_overlap, start))
+        start = min(boundaries[k], end)
+    return chunks
+def iter_windows(file_path:str, window_size:int=1<<20):
+    """Read the file in fixed size windows instead of loading it whole"""
     with open(file_path,'r', encoding='utf-8') as f:
-        return f.read()
-def setup_rag(text_file_path:str, persist_directry:str="./chroma_db"):
-    
-    if os.path.exists(persist_directry):
-        embeddings= OpenAIEmbeddings(model="text-embedding-3-small")
-        vector_store = Chroma(persist_directory=persist_directry, embedding_function=embeddings)
-        print("using the existing vector store")
-    else:
-        text = load_text(text_file_path)
+        while window := f.read(window_size):
+            yield window
+def iter_chunks(file_path:str):
+    """Split the file window by window. The text of each window's last chunk is
+    carried into the next window, so no chunk is cut at a window boundary."""
+    carry = ""
+    for window in iter_windows(file_path):
+        text = carry + window
+        chunks = split_text(text)
+        if not chunks:
+            carry = ""
+            continue
+        carry = text[text.rindex(chunks[-1]):]
+        yield from chunks[:-1]
+    yield from split_text(carry)
+# content hash ids, kept apart from the uuid keyed "langchain" collection older versions wrote
+COLLECTION_NAME = "knowledge_chunks"
+EMBED_BATCH_SIZE = 100
+EMBED_CONCURRENCY = 8
+@retry(
+    wait=wait_exponential(multiplier=1, min=1, max=60),
+    retry=retry_if_exception_type(openai.RateLimitError),
+    stop=stop_after_attempt(6),
+)
+async def embed_batch(embeddings:OpenAIEmbeddings, chunks:list[str], semaphore:asyncio.Semaphore)->list[list[float]]:
+    async with semaphore:
+        return await embeddings.aembed_documents(chunks)
+async def embed_chunks(embeddings:OpenAIEmbeddings, chunks:list[str])->list[list[float]]:
+    """Embed the chunks in sub-batches, running up to EMBED_CONCURRENCY requests at once"""
+    semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+    batches = [chunks[i:i+EMBED_BATCH_SIZE] for i in range(0, len(chunks), EMBED_BATCH_SIZE)]
+    results = await asyncio.gather(*(embed_batch(embeddings, batch, semaphore) for batch in batches))
+    return [vector for batch in results for vector in batch]
+async def ingest_batch(collection, embeddings:OpenAIEmbeddings, ids:list[str], chunks:list[str])->int:
+    """Embed and store the chunks the collection doesn't already hold, returns how many were added"""
+    # ids are content hashes, so chunks repeated within the batch collapse to one entry
+    unique = dict(zip(ids, chunks))
+    existing = set(collection.get(ids=list(unique), include=[])["ids"])
+    new_chunks = [(id_, chunk) for id_, chunk in unique.items() if id_ not in existing]
+    if not new_chunks:
+        return 0
+    ids = [id_ for id_, _ in new_chunks]
+    chunks = [chunk for _, chunk in new_chunks]
+    vectors = np.asarray(await embed_chunks(embeddings, chunks), dtype=np.float32)
+    collection.add(ids=ids, documents=chunks, embeddings=vectors)
+    return len(chunks)
+def chunk_id(chunk:str)->str:
+    """Content addressed id, an unchanged chunk keeps its id across re-ingestion"""
+    return hashlib.blake2b(chunk.encode("utf-8"), digest_size=16).hexdigest()
+@dataclass(slots=True)
+class Hit:
+    content:str
+    metadata:dict
+    score:float|None  # distance from the query, lower is closer
+class VectorIndex:
+    """The whole knowledge base held in memory as one normalized float32 matrix.
+    Chroma stays the persistent store, but for a KB of a few thousand chunks an
+    exact cosine scan costs less than a single round trip through chroma.
+    Plain arrays only, so one index can be shared by jobs running on different event loops."""
+    def __init__(self, chunks:list[str], metadatas:list[dict], vectors:np.ndarray):
+        self.chunks = chunks
+        self.metadatas = metadatas
+        self.vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True) if len(chunks) else vectors
+
+    @classmethod
+    def from_collection(cls, collection)->VectorIndex:
+        data = collection.get(include=["documents", "metadatas", "embeddings"])
+        # an empty collection may come back with no embeddings array at all
+        vectors = np.asarray(data["embeddings"] if data["embeddings"] is not None else [], dtype=np.float32)
+        return cls(data["documents"], [metadata or {} for metadata in data["metadatas"]], vectors)
+
+    def search(self, embedding, k:int)->list[Hit]:
+        if not self.chunks:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        sims = self.vectors @ (query / np.linalg.norm(query))
+        k = min(k, len(self.chunks))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [Hit(self.chunks[i], self.metadatas[i], float(1 - sims[i])) for i in top]
+async def setup_rag(text_file_path:str, persist_directry:str=PERSIST_DIRECTORY):
+    # chromadb is slow to import, only the ingestion step needs it
+    import chromadb
 
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
-        documnets = [Document(page_content = chunk) for chunk in splitter.split_text(text)]
-        print(documnets)
-        print(len(documnets))
-        print(documnets[0])
+    embeddings = make_embeddings()
+    client = chromadb.PersistentClient(path=persist_directry)
+    # embeddings are computed here, so chroma gets no embedding function of its own
+    collection = client.get_or_create_collection(COLLECTION_NAME, embedding_function=None)
 
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        vector_store = Chroma.from_documents(documnets, embeddings, persist_directory=persist_directry)
-    return vector_store
-async def query_rag(query:str, vector_store:Chroma):
-    docs = vector_store.similarity_search(query, k=2)
-    return docs
+    # chroma rejects adds above its max batch size, chunks are flushed as soon as a batch is full
+    max_batch_size = min(client.get_max_batch_size(), 500)
+    ids, chunks, added = [], [], 0
+    current_ids = set()
+    for chunk in iter_chunks(text_file_path):
+        ids.append(chunk_id(chunk))
+        current_ids.add(ids[-1])
+        chunks.append(chunk)
+        if len(chunks) >= max_batch_size:
+            added += await ingest_batch(collection, embeddings, ids, chunks)
+            ids, chunks = [], []
+    if chunks:
+        added += await ingest_batch(collection, embeddings, ids, chunks)
+
+    # drop chunks the file no longer produces, otherwise an edited file keeps serving its old text
+    stale = [id_ for id_ in collection.get(include=[])["ids"] if id_ not in current_ids]
+    for i in range(0, len(stale), max_batch_size):
+        collection.delete(ids=stale[i:i+max_batch_size])
+    if added or stale:
+        print(f"added {added} new chunks and removed {len(stale)} stale chunks from the vector store")
+    else:
+        print("using the existing vector store")
+    return VectorIndex.from_collection(collection)
+def make_embeddings()->OpenAIEmbeddings:
+    """A new embeddings client. Its async HTTP connections are bound to the event loop
+    that first uses them, so every job needs its own."""
+    # langchain_openai pulls in tiktoken, keep it out of the module import
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model=EMBEDDING_MODEL)
+_vector_index: VectorIndex | None = None
+# jobs may run on separate event loops in one process, so this is a thread lock, not an asyncio one
+_vector_index_lock = threading.Lock()
+def load_vector_index(persist_directry:str=PERSIST_DIRECTORY)->VectorIndex:
+    """The process wide vector index, read from the store on the first call.
+    Only reads, ingestion is a separate step run once before the workers start
+    (python -m src.tools.rag), so parallel worker processes never write to chroma."""
+    global _vector_index
+    with _vector_index_lock:
+        if _vector_index is None:
+            # a missing store would otherwise be created here, by every worker at once
+            if not Path(persist_directry).is_dir():
+                raise RuntimeError(f"no vector store at {persist_directry}, run `python -m src.tools.rag` to ingest the knowledge base first")
+            import chromadb
+            from chromadb.errors import NotFoundError
+            client = chromadb.PersistentClient(path=persist_directry)
+            try:
+                collection = client.get_collection(COLLECTION_NAME, embedding_function=None)
+            except NotFoundError as e:
+                raise RuntimeError(f"no {COLLECTION_NAME} collection in {persist_directry}, run `python -m src.tools.rag` to ingest the knowledge base first") from e
+            _vector_index = VectorIndex.from_collection(collection)
+    return _vector_index
+async def query_rag(query:str, vector_index:VectorIndex, embeddings:OpenAIEmbeddings):
+    # the embedding goes through the async OpenAI client, so the event loop keeps audio
+    # flowing while we wait for it; the in-memory search is cheap enough to run inline
+    query_embedding = await embeddings.aembed_query(query)
+    return vector_index.search(query_embedding, k=2)
 if __name__ == "__main__":
-    vector_store=setup_rag("C:/Users/ujwal/OneDrive/Documents/GitHub/SPAM_everything/LiveKit_demo/voice-agent/knowledge/rag_file.txt")
-    text = "whats the name of the company"
-    return_text=query_rag(text,vector_store)
-    print(return_text)
\ No newline at end of file
+    # the ingestion step, run once whenever the knowledge file changes and before starting the agent.
+    # one event loop for both steps, the embeddings client keeps connections bound to it
+    async def main():
+        vector_index = await setup_rag(KNOWLEDGE_FILE)
+        text = "whats the name of the company"
+        print(await query_rag(text, vector_index, make_embeddings()))
+    asyncio.run(main())
\ No newline at end of file
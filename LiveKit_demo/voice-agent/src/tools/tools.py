@@ -1,21 +1,44 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from livekit.agents import RunContext
 from livekit.agents.llm import function_tool
-from src.tools.rag import query_rag,setup_rag
+from src.tools.rag import VectorIndex, query_rag
 import httpx
+if TYPE_CHECKING:
+    from langchain_openai import OpenAIEmbeddings
+
+@dataclass
+class SessionResources:
+    """Per job state, handed to the tools through the session's userdata"""
+    vector_index: VectorIndex
+    embeddings: "OpenAIEmbeddings"
+    http: httpx.AsyncClient
+
+def make_http_client()->httpx.AsyncClient:
+    """One client per job, so repeat lookups in a conversation reuse the open keep-alive connection"""
+    return httpx.AsyncClient(timeout=10, limits=httpx.Limits(max_keepalive_connections=20))
+def format_contact(data)->str:
+    """Render a webhook response as "key: value" lines, the webhook may answer with an
+    object, a list of objects or a bare value"""
+    if isinstance(data, dict):
+        return "\n".join(f"{key}: {value}" for key, value in data.items())
+    if isinstance(data, list):
+        return "\n\n".join(format_contact(item) for item in data)
+    return str(data)
 @function_tool
 async def get_wheather(city: str)->str:
     """Get wheather of a city"""
     return f"the wheather of {city} is sunny"
 
 @function_tool(description="Use this tool to query information about the COMPANY from the vector database")
-async def query_information(query:str)->str:
+async def query_information(context:RunContext[SessionResources], query:str)->str:
     """Query information about the company from the vector database"""
-    file_path="C:/Users/ujwal/OneDrive/Documents/GitHub/SPAM_everything/LiveKit_demo/voice-agent/knowledge/rag_file.txt"
-    vector_db=setup_rag(file_path,"./chroma_db")
-    docs =await query_rag(query,vector_db)
-    return "\n".join([doc.page_content for doc in docs]) if docs else "No relevant information found."
+    resources = context.userdata
+    docs =await query_rag(query,resources.vector_index,resources.embeddings)
+    return "\n".join(doc.content for doc in docs) if docs else "No relevant information found."
 
 @function_tool(description="use this tool to get contact informatio of people")
-async def get_contact_info(name:str)->str:
+async def get_contact_info(context:RunContext[SessionResources], name:str)->str:
     """Get contact information of a person
     args:
     name: name of the person with first letter capitalized eg:John, Ujwal
@@ -24,15 +47,10 @@ async def get_contact_info(name:str)->str:
 """
     url = "http://localhost:5678/webhook-test/4be28cc1-5fe6-48ee-bc36-7ec162b48e90"
     payload = {"name":name}
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-            json_data=response.json()
-            return "\n".join([f"{key}: {value}" for key, value in json_data.items()])
-        except httpx.RequestError as e:
-            return f"Error: {e}"
-        except httpx.HTTPError as e:
-            return f"Error: {e}"
-        except Exception as e:
-            return f"Error: {e}"
\ No newline at end of file
+    try:
+        response = await context.userdata.http.post(url, json=payload)
+        response.raise_for_status()
+        return format_contact(response.json()) or "No contact information found."
+    except (httpx.HTTPError, ValueError) as e:
+        # HTTPError covers RequestError, ValueError a body that isn't valid json
+        return f"Error: {e}"
\ No newline at end of file